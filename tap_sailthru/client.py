@@ -2,15 +2,18 @@
 Python client for Sailthru API
 """
 
+import copy
 import hashlib
 import json
 import math
 import sys
+import time
 from typing import Union
 
 import backoff
-from requests import Session
-from requests.exceptions import Timeout
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
 from singer import get_logger, metrics
 
 LOGGER = get_logger()
@@ -18,9 +21,20 @@ LOGGER = get_logger()
 # Backoff retries
 MAX_RETRIES = 3
 
+# seconds to wait on a 429 response without a "X-Rate-Limit-Reset" header,
+# Sailthru rate limits are per minute
+RATE_LIMIT_WAIT = 60
+
 # timeout request after 300 seconds
 REQUEST_TIMEOUT = 300
 
+# number of host pools kept by the session
+POOL_CONNECTIONS = 16
+
+# default number of export jobs and user profiles requested at the same time
+JOB_CONCURRENCY = 8
+USER_FETCH_CONCURRENCY = 16
+
 # pylint: disable=missing-class-docstring
 class SailthruClientError(Exception):
     pass
@@ -133,26 +147,53 @@ def raise_for_error(response):
         raise exception(message, response) from None
     raise exception(message) from None
 
+def get_concurrency(value, default):
+    """
+    Returns a concurrency config value as an integer, or the default
+    if the value is 0, "0", "" or not passed.
+    """
+    if value and int(float(value)):
+        return int(float(value))
+    return default
+
 def retry_after_wait_gen():
     while True:
         # This is called in an except block so we can retrieve the exception
         # and check it.
         exc_info = sys.exc_info()
         resp = exc_info[1].response
-        sleep_time_str = resp.headers.get('X-Rate-Limit-Remaining')
+        # "X-Rate-Limit-Reset" is the UNIX time at which the rate limit resets
+        reset_time_str = resp.headers.get('X-Rate-Limit-Reset')
+        if reset_time_str:
+            sleep_time = max(math.ceil(float(reset_time_str) - time.time()), 1)
+        else:
+            sleep_time = RATE_LIMIT_WAIT
         LOGGER.info(f'API rate limit exceeded -- sleeping for '
-                    f'{sleep_time_str} seconds')
-        yield math.floor(float(sleep_time_str))
+                    f'{sleep_time} seconds')
+        yield sleep_time
 
 
 class SailthruClient:
     base_url = 'https://api.sailthru.com'
 
-    def __init__(self, api_key, api_secret, user_agent, request_timeout=REQUEST_TIMEOUT) -> None:
+    # pylint: disable=too-many-arguments
+    def __init__(self, api_key, api_secret, user_agent, request_timeout=REQUEST_TIMEOUT,
+                 job_concurrency=JOB_CONCURRENCY, user_fetch_concurrency=USER_FETCH_CONCURRENCY) -> None:
         self.__api_key = api_key
         self.__api_secret = api_secret
+        self.job_concurrency = get_concurrency(job_concurrency, JOB_CONCURRENCY)
+        self.user_fetch_concurrency = get_concurrency(user_fetch_concurrency, USER_FETCH_CONCURRENCY)
         self.session = Session()
+        # keep connections alive across API calls and export downloads, the
+        # users stream runs its parent's job workers alongside its own, plus
+        # the main thread downloading the exports
+        pool_maxsize = self.job_concurrency + self.user_fetch_concurrency + 1
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.headers = {'User-Agent': user_agent}
+        # the /list response, shared by the lists stream and its child streams
+        self.__lists_response = None
 
         # Set request timeout to config param `request_timeout` value.
         # If value is 0,"0","" or not passed then it set default to 300 seconds.
@@ -221,6 +262,17 @@ class SailthruClient:
         """
         return self.get('/list', params)
 
+    def get_cached_lists(self) -> dict:
+        """
+        Get all the lists in Sailthru, the /list endpoint is called only once
+        per client.
+
+        :return: A copy of the API response, which the caller may modify.
+        """
+        if self.__lists_response is None:
+            self.__lists_response = self.get_lists()
+        return copy.deepcopy(self.__lists_response)
+
     def get_ad_targeter_plans(self, params: dict = None) -> dict:
         """
         Get all info on Ad Targeter Plans.
@@ -302,6 +354,22 @@ class SailthruClient:
 
         return self.post('/job', params)
 
+    @backoff.on_exception(backoff.expo,
+                          (RequestsConnectionError, Timeout),
+                          max_tries=MAX_RETRIES,
+                          factor=2)
+    def get_export(self, export_url: str) -> Response:
+        """
+        Opens a streamed download of a completed export job file.
+
+        The file is fetched through the client's session so back to back
+        downloads reuse its keep-alive connections.
+
+        :param export_url: The export URL returned by the job endpoint
+        :return: A streamed response, to be closed by the caller
+        """
+        return self.session.get(export_url, stream=True, timeout=self.__request_timeout)
+
     # pylint: disable=missing-function-docstring
     def get(self, endpoint, params):
         return self._build_request(endpoint, params, 'GET')
@@ -316,9 +384,11 @@ class SailthruClient:
         return self._make_request(url, payload, method)
 
 
+    # no jitter, the wait must last until the rate limit resets
     @backoff.on_exception(retry_after_wait_gen,
                           SailthruClient429Error,
-                          max_tries=MAX_RETRIES)
+                          max_tries=MAX_RETRIES,
+                          jitter=None)
     @backoff.on_exception(backoff.expo,
                           (SailthruClientError,
                           SailthruServer5xxError,
@@ -2,28 +2,126 @@
 This module defines the stream classes and their individual sync logic.
 """
 
+import copy
 import csv
 import datetime
+import io
+import random
+import sys
 import time
-from typing import Any, Iterator
-from functools import lru_cache
-from datetime import timedelta
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Iterable, Iterator, Tuple
+from itertools import islice
 import singer
 from singer import Transformer, metrics
+from singer.messages import RecordMessage, format_message
 from singer.utils import strftime,now as dt_now
 from tap_sailthru.client import SailthruClient
 from tap_sailthru.transform import (flatten_user_response,
+                                    get_daily_job_dates,
                                     get_start_and_end_date_params,
+                                    hash_record,
                                     rfc2822_to_datetime,
                                     transform_keys_to_snake_case)
 
 LOGGER = singer.get_logger()
 
+# export job status polling interval (seconds), grows exponentially up to the max
+JOB_POLL_INITIAL_INTERVAL = 0.25
+JOB_POLL_BACKOFF_FACTOR = 1.5
+JOB_POLL_MAX_INTERVAL = 30
+# random +/- 20% applied to each interval so concurrent jobs do not poll in lockstep
+JOB_POLL_JITTER = 0.2
+
+# read buffer size (bytes) used when streaming export CSVs
+CSV_CHUNK_SIZE = 1 << 20
+
+# number of user profiles fetched per batch of parent records
+USER_BATCH_SIZE = 256
+
+# number of record messages buffered before they are written to stdout
+RECORD_BUFFER_SIZE = 500
+
 # pylint: disable=missing-class-docstring
 class SailthruJobTimeoutError(Exception):
     pass
 
+class RecordBuffer:
+    """
+    Buffers singer record messages and writes them to stdout in batches,
+    instead of one write and flush per record.
+
+    :param tap_stream_id: The stream the records belong to
+    :param buffer_size: The number of records to buffer before writing
+    """
+
+    def __init__(self, tap_stream_id: str, buffer_size: int = RECORD_BUFFER_SIZE):
+        self.tap_stream_id = tap_stream_id
+        self.buffer_size = buffer_size
+        self.lines = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def write(self, record: dict) -> None:
+        """
+        Formats a record message and buffers it.
+
+        :param record: The record to write
+        """
+        message = RecordMessage(stream=self.tap_stream_id, record=record)
+        self.lines.append(format_message(message))
+        if len(self.lines) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes all the buffered record messages to stdout.
+        """
+        if self.lines:
+            sys.stdout.write('\n'.join(self.lines) + '\n')
+            sys.stdout.flush()
+            self.lines = []
+
+
+class ChunkStream(io.RawIOBase):
+    """
+    A readable raw stream over an iterator of bytes chunks, the bytes of a
+    chunk that do not fit in a read are kept for the next one.
+
+    :param chunks: An iterator of bytes chunks
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        super().__init__()
+        self.chunks = chunks
+        self.leftover = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        """
+        Reads bytes into a buffer, returns 0 once the chunks are exhausted.
+
+        :param buffer: The writable buffer to fill
+        :return: The number of bytes read
+        """
+        while not self.leftover:
+            try:
+                # slicing a memoryview does not copy the chunk
+                self.leftover = memoryview(next(self.chunks))
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self.leftover))
+        buffer[:size] = self.leftover[:size]
+        self.leftover = self.leftover[size:]
+        return size
+
+
 class BaseStream:
     """
     A base class representing singer streams.
@@ -42,6 +140,9 @@ class BaseStream:
 
     def __init__(self, client: SailthruClient):
         self.client = client
+        # each instance gets its own params, the class level defaults are
+        # shared by every instance of the stream and must not be mutated
+        self.params = copy.deepcopy(self.params)
 
     def get_records(self, bookmark_datetime: datetime = None, is_parent: bool = False) -> list:
         """
@@ -68,15 +169,17 @@ class BaseStream:
         parent = self.parent(self.client)
         return parent.get_records(bookmark_datetime, is_parent=True)
 
-    def post_job(self, parameter: Any = None) -> dict:
+    def post_job(self, parameter: Any = None, params: dict = None) -> dict:
         """
         Creates a data export background job. More details:
         https://getstarted.sailthru.com/developers/api/job/
 
         :param parameter: Any parameter type to be passed to the logger
+        :param params: The job parameters, defaults to the stream params
         :return: The API response as a dictionary
         """
-        job_name = self.params.get('job')
+        params = params or self.params
+        job_name = params.get('job')
         if parameter:
             # pylint: disable=logging-fstring-interpolation
             LOGGER.info(f'Starting background job for {job_name},'
@@ -84,7 +187,45 @@ class BaseStream:
         else:
             # pylint: disable=logging-fstring-interpolation
             LOGGER.info(f'Starting background job for {job_name}')
-        return self.client.create_job(self.params)
+        return self.client.create_job(params)
+
+    def run_job(self, parameter: Any, params: dict) -> str:
+        """
+        Creates a data export background job and waits for it to complete.
+
+        :param parameter: Any parameter type to be passed to the logger
+        :param params: The job parameters
+        :return: the export URL, or None if the job was rejected
+        """
+        response = self.post_job(parameter=parameter, params=params)
+        if response.get("error"):
+            # https://getstarted.sailthru.com/developers/api/job/#Error_Codes
+            # Error code 99 = You may not export a blast that has been sent
+            # pylint: disable=logging-fstring-interpolation
+            LOGGER.info(f"Skipping {params.get('job')} job for parameter={parameter}")
+            return None
+        return self.get_job_url(job_id=response['job_id'])
+
+    def get_export_urls(self, jobs: Iterable[Tuple[Any, dict]]) -> Iterator[Tuple[Any, str]]:
+        """
+        Runs export jobs concurrently and yields their export URLs in the
+        order the jobs complete.
+
+        :param jobs: An iterable of (parameter, job params) tuples
+        :return: A generator of (parameter, export URL) tuples
+        """
+        with ThreadPoolExecutor(max_workers=self.client.job_concurrency) as executor:
+            futures = {executor.submit(self.run_job, parameter, params): parameter
+                       for parameter, params in jobs}
+            try:
+                for future in as_completed(futures):
+                    export_url = future.result()
+                    if export_url:
+                        yield futures[future], export_url
+            finally:
+                # do not start queued jobs if the sync stops early
+                for future in futures:
+                    future.cancel()
 
     def get_job_url(self, job_id: str, timeout: int = 600) -> str:
         """
@@ -95,13 +236,18 @@ class BaseStream:
         :param timeout: the default timeout (seconds) before halting request
         :return: the export URL
         """
-        status = ''
+        attempt = 0
+        status = None
         job_start_time = singer.utils.now()
-        while status != 'completed':
+        while True:
             response = self.client.get_job({'job_id': job_id})
-            status = response.get('status')
-            # pylint: disable=logging-fstring-interpolation
-            LOGGER.info(f'Job report status: {status}')
+            previous_status, status = status, response.get('status')
+            # only log status transitions, not every poll
+            if status != previous_status:
+                # pylint: disable=logging-fstring-interpolation
+                LOGGER.info(f'Job {job_id} report status: {status}')
+            if status == 'completed':
+                return response.get('export_url')
             now = singer.utils.now()
             if (now - job_start_time).seconds > timeout:
                 # pylint: disable=logging-fstring-interpolation
@@ -109,36 +255,66 @@ class BaseStream:
                                 f' exceeded {timeout} second timeout'
                                 f'latest_status: {status}')
                 raise SailthruJobTimeoutError
-            time.sleep(1)
-
-        return response.get('export_url')
-
-    @staticmethod
-    def process_job_csv(export_url: str,
-                        chunk_size: int = 1024,
+            # poll short jobs quickly and back off for long running ones
+            interval = min(JOB_POLL_MAX_INTERVAL,
+                           JOB_POLL_INITIAL_INTERVAL * JOB_POLL_BACKOFF_FACTOR ** attempt)
+            time.sleep(interval * random.uniform(1 - JOB_POLL_JITTER, 1 + JOB_POLL_JITTER))
+            attempt += 1
+
+    def process_job_csv(self,
+                        export_url: str,
+                        chunk_size: int = CSV_CHUNK_SIZE,
                         parent_params: dict = None) -> Iterator[dict]:
         """
         Fetches CSV from URL and streams each line.
 
+        The download goes through the client's session so that back to back
+        exports reuse the same keep-alive connection, and the default
+        "Accept-Encoding: gzip, deflate" header lets the CSV be compressed on
+        the wire. The content is decompressed by requests as it is streamed.
+
         :param export_url: The URL from which to fetch the CSV data from
-        :param chunk_size: The chunk size to read per line
+        :param chunk_size: The buffer size used to read the response
         :param parent_params: A dictionary with "parent" parameters to append
             to each record
         :return: A generator of a dictionary
         """
-        with requests.get(export_url, stream=True) as req:
-            reader = csv.DictReader(line.decode('utf-8') for line
-                                    in req.iter_lines(chunk_size=chunk_size))
-            for row in reader:
+        with self.client.get_export(export_url) as req:
+            # decode the decompressed chunks in a buffered stream instead of
+            # line by line, newline='' lets the csv module handle quoted line breaks
+            raw = ChunkStream(req.iter_content(chunk_size))
+            stream = io.TextIOWrapper(io.BufferedReader(raw, buffer_size=chunk_size),
+                                      encoding='utf-8',
+                                      newline='')
+            reader = csv.reader(stream)
+            keys = next(reader, None)
+            if not keys:
+                return
+            num_keys = len(keys)
+            for values in reader:
+                if not values:
+                    continue
+                row = dict(zip(keys, values))
+                # same as csv.DictReader, missing trailing fields are None
+                if len(values) < num_keys:
+                    row.update(dict.fromkeys(keys[len(values):]))
                 if parent_params:
                     row.update(parent_params)
                 yield row
 
-    def date_records_to_datetime(self, record):
+    def date_records_to_datetime(self, record: dict) -> dict:
+        """
+        Converts the RFC 2822 date fields of a record to ISO 8601 in place.
+
+        :param record: The record to convert
+        :return: A dictionary of the parsed datetime objects keyed by field
+        """
+        parsed = {}
         for key in self.date_keys:
-            if key in record:
-                if record[key]:
-                    record[key] = rfc2822_to_datetime(record[key]).isoformat()
+            if record.get(key):
+                parsed[key] = rfc2822_to_datetime(record[key])
+                record[key] = parsed[key].isoformat()
+        return parsed
 
 
 # pylint: disable=abstract-method
@@ -176,22 +352,50 @@ class IncrementalStream(BaseStream):
         bookmark_datetime = singer.utils.strptime_to_utc(start_date)
         max_datetime = bookmark_datetime
 
-        with metrics.record_counter(self.tap_stream_id) as counter:
+        # records sharing the bookmarked replication value were already
+        # emitted by the previous sync, their hashes are used to skip them
+        seen_hashes = set(singer.get_bookmark(state,
+                                              self.tap_stream_id,
+                                              'record_hashes_seen',
+                                              []))
+        max_hashes = set(seen_hashes)
+
+        with metrics.record_counter(self.tap_stream_id) as counter, \
+                RecordBuffer(self.tap_stream_id) as record_buffer:
             for record in self.get_records(bookmark_datetime):
-                self.date_records_to_datetime(record)
+                parsed_dates = self.date_records_to_datetime(record)
                 transform_keys_to_snake_case(record)
-                record_datetime = singer.utils.strptime_to_utc(record[self.replication_key])
-                if record_datetime >= bookmark_datetime:
-                    transformed_record = transformer.transform(record, stream_schema, stream_metadata)
-                    singer.write_record(self.tap_stream_id, transformed_record)
-                    counter.increment()
-                    max_datetime = max(record_datetime, max_datetime)
-            bookmark_date = singer.utils.strftime(max_datetime)
+                # reuse the datetime parsed during date conversion when available
+                record_datetime = parsed_dates.get(self.replication_key) or \
+                    singer.utils.strptime_to_utc(record[self.replication_key])
+                if record_datetime < bookmark_datetime:
+                    continue
+
+                transformed_record = transformer.transform(record, stream_schema, stream_metadata)
+                record_hash = None
+                if record_datetime == bookmark_datetime:
+                    record_hash = hash_record(transformed_record)
+                    if record_hash in seen_hashes:
+                        continue
+
+                record_buffer.write(transformed_record)
+                counter.increment()
+                # keep the running max as a datetime, it is only
+                # formatted once when the bookmark is written
+                if record_datetime > max_datetime:
+                    max_datetime = record_datetime
+                    max_hashes = set()
+                if record_datetime == max_datetime:
+                    max_hashes.add(record_hash or hash_record(transformed_record))
 
         state = singer.write_bookmark(state,
                                       self.tap_stream_id,
                                       self.replication_key,
-                                      bookmark_date)
+                                      singer.utils.strftime(max_datetime))
+        state = singer.write_bookmark(state,
+                                      self.tap_stream_id,
+                                      'record_hashes_seen',
+                                      sorted(max_hashes))
         return state
 
 # pylint: disable=abstract-method
@@ -221,11 +425,12 @@ class FullTableStream(BaseStream):
         :param transformer: A singer Transformer object
         :return: State data in the form of a dictionary
         """
-        with metrics.record_counter(self.tap_stream_id) as counter:
+        with metrics.record_counter(self.tap_stream_id) as counter, \
+                RecordBuffer(self.tap_stream_id) as record_buffer:
             for record in self.get_records():
                 transform_keys_to_snake_case(record)
                 transformed_record = transformer.transform(record, stream_schema, stream_metadata)
-                singer.write_record(self.tap_stream_id, transformed_record)
+                record_buffer.write(transformed_record)
                 counter.increment()
 
         return state
@@ -278,8 +483,11 @@ class Blasts(IncrementalStream):
         else:
             for status in self.params['statuses']:
                 response = self.client.get_blasts({'status': status})
-                # Add the blast status to each blast record
-                yield from (dict(item, status=status) for item in response.get('blasts'))
+                # Add the blast status to each blast record, the response is
+                # local to this call so the records can be updated in place
+                for item in response.get('blasts'):
+                    item['status'] = status
+                    yield item
 
 
 class BlastQuery(FullTableStream):
@@ -310,17 +518,9 @@ class BlastQuery(FullTableStream):
         # https://getstarted.sailthru.com/analytics/message-summary/reports/#:~:text=Note%3A%20Campaign%20data%20for%20any%20of%20the%20above%20reports%20cannot%20be%20exported%20after%20540%20days.
         date_limit = dt_now() - datetime.timedelta(days=540)
         LOGGER.info("Fetching for blasts Since %s",date_limit)
-        for blast_id in self.get_parent_data(date_limit):
-            self.params['blast_id'] = blast_id
-            response = self.post_job(parameter=blast_id)
-            if response.get("error"):
-                # https://getstarted.sailthru.com/developers/api/job/#Error_Codes
-                # Error code 99 = You may not export a blast that has been sent
-                # pylint: disable=logging-fstring-interpolation
-                LOGGER.info(f"Skipping blast_id: {blast_id}")
-                continue
-            export_url = self.get_job_url(job_id=response['job_id'])
-
+        jobs = ((blast_id, dict(self.params, blast_id=blast_id))
+                for blast_id in self.get_parent_data(date_limit))
+        for blast_id, export_url in self.get_export_urls(jobs):
             # Add blast id to each record
             yield from self.process_job_csv(export_url=export_url,
                                             parent_params={'blast_id': blast_id})
@@ -342,13 +542,14 @@ class BlastQuery(FullTableStream):
         :param transformer: A singer Transformer object
         :return: State data in the form of a dictionary
         """
-        with metrics.record_counter(self.tap_stream_id) as counter:
+        with metrics.record_counter(self.tap_stream_id) as counter, \
+                RecordBuffer(self.tap_stream_id) as record_buffer:
             for record in self.get_records():
                 transform_keys_to_snake_case(record)
                 record["first_ten_clicks"] = record["first_ten_clicks"].split()
                 record["first_ten_clicks_time"] = record["first_ten_clicks_time"].split("|")
                 transformed_record = transformer.transform(record, stream_schema, stream_metadata)
-                singer.write_record(self.tap_stream_id, transformed_record)
+                record_buffer.write(transformed_record)
                 counter.increment()
 
         return state
@@ -388,9 +589,10 @@ class Lists(FullTableStream):
     date_keys = ['create_time']
 
     # pylint: disable=missing-function-docstring
-    @lru_cache
     def get_lists(self):
-        return self.client.get_lists()
+        # the lists stream and every child stream using Lists as parent
+        # share a single API call
+        return self.client.get_cached_lists()
 
     def get_records(self, bookmark_datetime=None, is_parent=False):
 
@@ -429,11 +631,9 @@ class BlastSaveList(FullTableStream):
 
     def get_records(self, bookmark_datetime=None, is_parent=False):
 
-        for list_name in self.get_parent_data():
-            self.params['list'] = list_name
-
-            response = self.post_job(parameter=self.params['list'])
-            export_url = self.get_job_url(job_id=response['job_id'])
+        jobs = ((list_name, dict(self.params, list=list_name))
+                for list_name in self.get_parent_data())
+        for _, export_url in self.get_export_urls(jobs):
             yield from self.process_job_csv(export_url=export_url)
 
 class Users(FullTableStream):
@@ -454,13 +654,44 @@ class Users(FullTableStream):
                     bookmark_datetime: datetime = None,
                     is_parent: bool = None):
 
+        profile_ids = self.get_profile_ids()
+        with ThreadPoolExecutor(max_workers=self.client.user_fetch_concurrency) as executor:
+            # fetch the profiles in batches to bound the number of pending requests
+            while True:
+                batch = list(islice(profile_ids, USER_BATCH_SIZE))
+                if not batch:
+                    break
+                futures = [executor.submit(self.get_user, profile_id) for profile_id in batch]
+                try:
+                    for future in as_completed(futures):
+                        yield future.result()
+                finally:
+                    # do not fetch the rest of the batch if a request fails
+                    # or the sync stops early
+                    for future in futures:
+                        future.cancel()
+
+    def get_profile_ids(self) -> Iterator[str]:
+        """
+        Returns the profile ids of the parent records.
+
+        :return: A generator of profile ids
+        """
         for record in self.get_parent_data():
             if not record.get('Profile Id'):
                 LOGGER.critical('no Profile Id for record')
                 continue
-            profile_id = record['Profile Id']
-            response = self.client.get_user({'id': profile_id})
-            yield flatten_user_response(response)
+            yield record['Profile Id']
+
+    def get_user(self, profile_id: str) -> dict:
+        """
+        Fetches a user profile and flattens it into a record.
+
+        :param profile_id: The profile id of the user
+        :return: The flattened user record
+        """
+        response = self.client.get_user({'id': profile_id})
+        return flatten_user_response(response)
 
 
 class PurchaseLog(IncrementalStream):
@@ -487,9 +718,7 @@ class PurchaseLog(IncrementalStream):
         now = singer.utils.now()
 
         # Generate a report for each day up until the today's date
-        while start_datetime.date() <= now.date():
-
-            job_date = start_datetime.strftime('%Y%m%d')
+        for job_date in get_daily_job_dates(start_datetime, now):
             self.params['start_date'] = job_date
             self.params['end_date'] = job_date
 
@@ -498,8 +727,6 @@ class PurchaseLog(IncrementalStream):
             export_url = self.get_job_url(job_id=response['job_id'])
             yield from self.process_job_csv(export_url=export_url)
 
-            start_datetime += timedelta(days=1)
-
 
 STREAMS = {
     'ad_targeter_plans': AdTargeterPlans,
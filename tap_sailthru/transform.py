@@ -3,23 +3,73 @@ Module for transformation and utility functions.
 """
 
 import datetime
+import hashlib
+import json
 from email import utils
+from functools import lru_cache
+from typing import Iterator, Tuple
 
-import singer
+# layout of the dates returned by Sailthru, e.g. "Wed, 31 Mar 2021 22:15:07 -0400"
+RFC2822_FORMAT = '%a, %d %b %Y %H:%M:%S %z'
+RFC2822_LENGTH = 31
 
+# length of the date window returned by get_start_and_end_date_params
+JOB_DATE_WINDOW = datetime.timedelta(days=30)
+ONE_DAY = datetime.timedelta(days=1)
 
-def rfc2822_to_datetime(datestring: str) -> datetime:
+_MONTHS = {month: index for index, month in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+
+
+def _parse_fixed_rfc2822(datestring: str) -> datetime.datetime:
+    """
+    Parses a date string in the fixed layout of RFC2822_FORMAT by slicing.
+
+    :param datestring: the date string, e.g. "Wed, 31 Mar 2021 22:15:07 -0400"
+    :return: datetime object in UTC timezone
+    :raises KeyError, ValueError: if the string does not match the layout
+    """
+    offset = int(datestring[27:29]) * 60 + int(datestring[29:31])
+    if datestring[26] == '-':
+        offset = -offset
+    return datetime.datetime(int(datestring[12:16]),
+                             _MONTHS[datestring[8:11]],
+                             int(datestring[5:7]),
+                             int(datestring[17:19]),
+                             int(datestring[20:22]),
+                             int(datestring[23:25]),
+                             tzinfo=datetime.timezone.utc) - datetime.timedelta(minutes=offset)
+
+
+# replication and date values repeat heavily within a sync (e.g. many
+# records modified in the same second), so parsed values are cached
+@lru_cache(maxsize=4096)
+def rfc2822_to_datetime(datestring: str) -> datetime.datetime:
     """
     Takes in a date string in RFC 2822 format and parses it into datetime.
 
     :param datestring: the date string in RFC 2822 format
     :return: datetime object in UTC timezone
     """
-    datetime_obj = utils.parsedate_to_datetime(datestring).isoformat()
-    return singer.utils.strptime_to_utc(datetime_obj)
-
-
-def get_start_and_end_date_params(start_datetime: datetime) -> datetime:
+    if (len(datestring) == RFC2822_LENGTH and datestring[3] == ','
+            and datestring[26] in '+-'):
+        try:
+            return _parse_fixed_rfc2822(datestring)
+        except (KeyError, ValueError):
+            pass
+    try:
+        return datetime.datetime.strptime(datestring, RFC2822_FORMAT).astimezone(datetime.timezone.utc)
+    except ValueError:
+        # fall back to the lenient email parser for any other RFC 2822 variant
+        datetime_obj = utils.parsedate_to_datetime(datestring)
+        if datetime_obj.tzinfo is None:
+            # "-0000" and unknown zone names carry no offset, treat them as UTC
+            return datetime_obj.replace(tzinfo=datetime.timezone.utc)
+        return datetime_obj.astimezone(datetime.timezone.utc)
+
+
+def get_start_and_end_date_params(
+        start_datetime: datetime.datetime) -> Tuple[datetime.datetime, datetime.datetime]:
     """
     Returns the start datetime and an end datetime that is 30 days added
     to the start datetime.
@@ -28,7 +78,34 @@ def get_start_and_end_date_params(start_datetime: datetime) -> datetime:
     :return: A 'start' datetime object and a 'end' datetime object that
         is 30 days from the start datetime
     """
-    return start_datetime, start_datetime + datetime.timedelta(days=30)
+    return start_datetime, start_datetime + JOB_DATE_WINDOW
+
+
+def format_date_for_job_params(date: datetime.date) -> str:
+    """
+    Formats a date the way the export job endpoints expect it, e.g. "20210331".
+
+    :param date: A date or datetime object
+    :return: The date as a YYYYMMDD string
+    """
+    return f'{date.year:04d}{date.month:02d}{date.day:02d}'
+
+
+def get_daily_job_dates(start_datetime: datetime.datetime,
+                        end_datetime: datetime.datetime) -> Iterator[str]:
+    """
+    Yields the job parameter date of every day from the start date up to
+    and including the end date.
+
+    :param start_datetime: A datetime object for the first day
+    :param end_datetime: A datetime object for the last day
+    :return: A generator of YYYYMMDD date strings
+    """
+    day = start_datetime.date()
+    end_day = end_datetime.date()
+    while day <= end_day:
+        yield format_date_for_job_params(day)
+        day += ONE_DAY
 
 
 def flatten_user_response(response: dict) -> dict:
@@ -46,20 +123,24 @@ def flatten_user_response(response: dict) -> dict:
         'cookie': keys.get('cookie'),
         'email': keys.get('email'),
         'vars': response.get('vars'),
-        'lists':list((response.get('lists') or {}).keys()),
+        'lists': list(response.get('lists') or ()),
         'engagement': response.get('engagement'),
         'optout_email': response.get('optout_email'),
     }
 
 
+@lru_cache(maxsize=1024)
 def _convert_to_snake_case(key: str) -> str:
     """
     Takes in a string and will convert it to snake case.
 
+    Records of a stream share the same few keys, so the conversions are
+    cached and computed once per key rather than once per record.
+
     :param key: The string to convert
     :return: A string converted to snake case
     """
-    return '_'.join(key.split(' ')).lower()
+    return key.replace(' ', '_').lower()
 
 
 def transform_keys_to_snake_case(record: dict) -> None:
@@ -68,5 +149,17 @@ def transform_keys_to_snake_case(record: dict) -> None:
 
     :param record: The dictionary to transform
     """
-    for key in list(record.keys()):
-        record[_convert_to_snake_case(key)] = record.pop(key)
+    converted = {_convert_to_snake_case(key): value for key, value in record.items()}
+    record.clear()
+    record.update(converted)
+
+
+def hash_record(record: dict) -> str:
+    """
+    Returns a stable hash of a record, independent of the order of its keys.
+
+    :param record: The dictionary to hash
+    :return: A hex digest string
+    """
+    serialized = json.dumps(record, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(serialized, digest_size=16).hexdigest()
@@ -0,0 +1,13 @@
+import pytest
+from tap_sailthru.client import SailthruClient
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    # skip the backoff and job polling sleeps in every test
+    monkeypatch.setattr("time.sleep", lambda *args, **kwargs: None)
+
+@pytest.fixture(scope="session")
+def sailthru_client():
+    # create sailthru client once, the requests are mocked, tests of the
+    # /list response cached by the client create their own client
+    return SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
@@ -24,3 +24,19 @@ def test_get_signature_string(client, secret, test_input, expected):
     ('password', {'a': ['test1', 'test2'], 'b': {'c': 'test3'}}, 'adde49d639598daa7ba79af7c2fff8f9')])
 def test_get_signature_hash(client, secret, test_input, expected):
     assert client.get_signature_hash(test_input, secret) == expected
+
+@pytest.mark.parametrize('concurrency, expected_jobs, expected_users', [
+    (None, 8, 16),  # no concurrency in config, default values are used
+    (4, 4, 4),      # integer in config
+    ("4", 4, 4),    # string format in config
+    ("", 8, 16),    # empty string in config, default values are used
+    ("0", 8, 16),   # zero in string format in config, default values are used
+])
+def test_concurrency_in_config(concurrency, expected_jobs, expected_users):
+    client = SailthruClient('test', 'test', 'test', 300, concurrency, concurrency)
+
+    assert client.job_concurrency == expected_jobs
+    assert client.user_fetch_concurrency == expected_users
+    # the connection pool holds a connection for every worker thread
+    adapter = client.session.get_adapter('https://api.sailthru.com')
+    assert adapter.poolmanager.connection_pool_kw['maxsize'] == expected_jobs + expected_users + 1
@@ -1,40 +1,34 @@
 import unittest
-import requests
-import json
 import tap_sailthru
 from tap_sailthru.discover import discover
 from unittest import mock
 
-# Mock response object
+# Mock response object, the client only reads the status code, headers and json body
 def get_mock_http_response(status_code, content={}):
-    contents = json.dumps(content)
-    response = requests.Response()
-    response.status_code = status_code
-    response.headers = {}
-    response._content = contents.encode()
-    return response
+    return mock.Mock(status_code=status_code, headers={}, json=mock.Mock(return_value=content))
 
 @mock.patch('requests.Session.request')
-@mock.patch('tap_sailthru.discover.get_schemas', side_effect = tap_sailthru.discover.get_schemas)
+@mock.patch.object(tap_sailthru.discover, 'get_schemas', wraps=tap_sailthru.discover.get_schemas)
 class TestCredCheckInDiscoverMode(unittest.TestCase):
 
+    config = {
+        "start_date": "2020-04-01T00:00:00Z",
+        "user_agent": "Stitch Tap (+support@stitchdata.com)",
+        "api_key": "test",
+        "api_secret": "test",
+    }
+
     def test_invalid_creds_401(self, mocked_schema, mocked_request):
         """
             Verify exception is raised for no access(401) error code for auth
             and get_schemas() is not called due to exception.
         """
-        # Prepare config and mock request to raise 401 error code
-        config = {
-            "start_date": "2020-04-01T00:00:00Z",
-            "user_agent": "Stitch Tap (+support@stitchdata.com)",
-            "api_key": "test",
-            "api_secret": "test",
-        }
+        # mock request to raise 401 error code
         mocked_request.return_value = get_mock_http_response(401, {})
 
         # Verify SailthruClientError exception is raised
         with self.assertRaises(tap_sailthru.client.SailthruClientError) as e:
-            catalog = discover(config)
+            catalog = discover(self.config)
 
         # Verify that get_schemas() is not called due to invalid credentials
         self.assertEqual(mocked_schema.call_count, 0)
@@ -44,17 +38,11 @@ class TestCredCheckInDiscoverMode(unittest.TestCase):
             Verify get_schemas() is called if auth credentials are valid
             and catalog object is returned from discover().
         """
-        # Prepare config and mock request to return 200 status code
-        config = {
-            "start_date": "2020-04-01T00:00:00Z",
-            "user_agent": "Stitch Tap (+support@stitchdata.com)",
-            "api_key": "test",
-            "api_secret": "test",
-        }
+        # mock request to return 200 status code
         mocked_request.return_value = get_mock_http_response(200, {})
 
         # Call discover mode
-        catalog = discover(config)
+        catalog = discover(self.config)
 
         # Verify that get_schemas() called once and catalog object is returned from discover()
         self.assertEqual(mocked_schema.call_count, 1)
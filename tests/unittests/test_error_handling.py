@@ -1,340 +1,141 @@
 from unittest import mock
+import pytest
 import tap_sailthru.client as client
-import unittest
-import requests
 
-# mocked response class
+# mocked response class, the client checks the status code itself and
+# never calls "raise_for_status"
 class Mockresponse:
-    def __init__(self, status_code, json, raise_error, headers=None):
+    def __init__(self, status_code, json_body, headers=None):
         self.status_code = status_code
-        self.raise_error = raise_error
-        self.text = json
+        self.json_body = json_body
         self.headers = headers
 
-    def raise_for_status(self):
-        if not self.raise_error:
-            return self.status_code
-
-        raise requests.HTTPError("Sample message")
-
     def json(self):
-        return self.text
+        return self.json_body
 
 # function to get mocked response
-def get_response(status_code, json={}, raise_error=False, headers=None):
-    return Mockresponse(status_code, json, raise_error, headers)
-
-@mock.patch("requests.Session.request")
-@mock.patch("time.sleep")
-class TestExceptionHandling(unittest.TestCase):
+def get_response(status_code, json_body={}, headers=None):
+    return Mockresponse(status_code, json_body, headers)
+
+# (status code, exception, response message, custom message)
+ERROR_CASES = [
+    (400, client.SailthruBadRequestError, "Bad request for the URL.",
+     "The request is missing or has a bad parameter."),
+    (401, client.SailthruUnauthorizedError, "Unauthorized for the URL.",
+     "Invalid authorization credentials."),
+    (403, client.SailthruForbiddenError, "Forbidden for the URL.",
+     "User does not have permission to access the resource."),
+    (404, client.SailthruNotFoundError, "Not Found.",
+     "The resource you have specified cannot be found."),
+    (405, client.SailthruMethodNotFoundError, "Method not found for the URL.",
+     "The provided HTTP method is not supported by the URL."),
+    (409, client.SailthruConflictError, "Conflict occurred for the URL.",
+     "The request could not be completed due to a conflict with the current state of the server."),
+    (429, client.SailthruClient429Error, "Rate limit exceeded for the URL.",
+     "API rate limit exceeded, please retry after some time."),
+    (500, client.SailthruInternalServerError, "Internal server error occurred.",
+     "An error has occurred at Sailthru's end."),
+]
+
+@pytest.fixture
+def mocked_request():
+    # mock the requests, the backoff sleeps are skipped by the "no_sleep" fixture,
+    # the payload signature is not under test here (see test_client.py)
+    with mock.patch("requests.Session.request") as mocked_request, \
+            mock.patch.object(client.SailthruClient, "get_signature_hash", return_value="test_signature"):
+        yield mocked_request
+
+@pytest.mark.parametrize("status_code, exception, message, custom_message", ERROR_CASES)
+def test_error_response_message(status_code, exception, message, custom_message):
     """
-        Test cases to verify error is raised with proper message
+        Test case to verify the error message from the response is used
     """
+    # mock json error response
+    response_json = {"error": 9, "errormsg": message}
+    response = get_response(status_code, response_json)
 
-    def test_400_error_response_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 400 error message from response
-        """
-        # mock json error response
-        response_json = {"error": 9, "errormsg": "Bad request for the URL."}
-        mocked_request.return_value = get_response(400, response_json, True)
-
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruBadRequestError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 400, Error: 9, Message: Bad request for the URL.")
-
-    def test_401_error_response_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 401 error message from response
-        """
-        # mock json error response
-        response_json = {"error": 9, "errormsg": "Unauthorized for the URL."}
-        mocked_request.return_value = get_response(401, response_json, True)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruUnauthorizedError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 401, Error: 9, Message: Unauthorized for the URL.")
-
-    def test_403_error_response_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 403 error message from response
-        """
-        # mock json error response
-        response_json = {"error": 9, "errormsg": "Forbidden for the URL."}
-        mocked_request.return_value = get_response(403, response_json, True)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruForbiddenError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 403, Error: 9, Message: Forbidden for the URL.")
-
-    def test_404_error_response_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 404 error message from response
-        """
-        # mock json error response
-        response_json = {"error": 9, "errormsg": "Not Found."}
-        mocked_request.return_value = get_response(404, response_json, True)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruNotFoundError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 404, Error: 9, Message: Not Found.")
-
-    def test_405_error_response_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 405 error message from response
-        """
-        # mock json error response
-        response_json = {"error": 9, "errormsg": "Method not found for the URL."}
-        mocked_request.return_value = get_response(405, response_json, True)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruMethodNotFoundError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 405, Error: 9, Message: Method not found for the URL.")
-
-    def test_409_error_response_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 409 error message from response
-        """
-        # mock json error response
-        response_json = {"error": 9, "errormsg": "Conflict occurred for the URL."}
-        mocked_request.return_value = get_response(409, response_json, True)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruConflictError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 409, Error: 9, Message: Conflict occurred for the URL.")
-
-    def test_429_error_response_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 429 error message from response
-        """
-        # mock json error response
-        response_json = {"error": 9, "errormsg": "Rate limit exceeded for the URL."}
-        mocked_request.return_value = get_response(429, response_json, True, {"X-Rate-Limit-Remaining": 1})
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruClient429Error) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 429, Error: 9, Message: Rate limit exceeded for the URL.")
-
-    def test_500_error_response_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 500 error message from response
-        """
-        # mock json error response
-        response_json = {"error": 9, "errormsg": "Internal server error occurred."}
-        mocked_request.return_value = get_response(500, response_json, True)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruInternalServerError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 500, Error: 9, Message: Internal server error occurred.")
-
-    def test_400_error_custom_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 400 error custom message
-        """
-        # mock json error response
-        response_json = {"error": 9, "message": "Bad request for the URL."}
-        mocked_request.return_value = get_response(400, response_json, True)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruBadRequestError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 400, Error: 9, Message: The request is missing or has a bad parameter.")
-
-    def test_401_error_custom_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 401 error custom message
-        """
-        # mock json error response
-        response_json = {"error": 9, "message": "Unauthorized for the URL."}
-        mocked_request.return_value = get_response(401, response_json, True)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruUnauthorizedError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 401, Error: 9, Message: Invalid authorization credentials.")
-
-    def test_403_error_custom_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 403 error custom message
-        """
-        # mock json error response
-        response_json = {"error": 9, "message": "Forbidden for the URL."}
-        mocked_request.return_value = get_response(403, response_json, True)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruForbiddenError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 403, Error: 9, Message: User does not have permission to access the resource.")
-
-    def test_404_error_custom_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 404 error custom message
-        """
-        # mock json error response
-        response_json = {"error": 9, "message": "Not Found."}
-        mocked_request.return_value = get_response(404, response_json, True)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruNotFoundError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 404, Error: 9, Message: The resource you have specified cannot be found.")
-
-    def test_405_error_custom_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 405 error custom message
-        """
-        # mock json error response
-        response_json = {"error": 9, "message": "Method not found for the URL."}
-        mocked_request.return_value = get_response(405, response_json, True)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruMethodNotFoundError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 405, Error: 9, Message: The provided HTTP method is not supported by the URL.")
-
-    def test_409_error_custom_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 409 error custom message
-        """
-        # mock json error response
-        response_json = {"error": 9, "message": "Conflict occurred for the URL."}
-        mocked_request.return_value = get_response(409, response_json, True)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruConflictError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 409, Error: 9, Message: The request could not be completed due to a conflict with the current state of the server.")
-
-    def test_429_error_custom_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 429 error custom message
-        """
-        # mock json error response
-        response_json = {"error": 9, "message": "Rate limit exceeded for the URL."}
-        mocked_request.return_value = get_response(429, response_json, True, {"X-Rate-Limit-Remaining": 1})
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruClient429Error) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
-
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 429, Error: 9, Message: API rate limit exceeded, please retry after some time.")
-
-    def test_500_error_custom_message(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify 500 error custom message
-        """
-        # mock json error response
-        response_json = {"error": 9, "message": "Internal server error occurred."}
-        mocked_request.return_value = get_response(500, response_json, True)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        with self.assertRaises(client.SailthruInternalServerError) as e:
-            # function call
-            sailthru_client._build_request("test_endpoint", {}, "GET")
+    with pytest.raises(exception) as e:
+        # function call
+        client.raise_for_error(response)
 
-        # verify the error is raised as expected with message
-        self.assertEqual(str(e.exception), "HTTP-error-code: 500, Error: 9, Message: An error has occurred at Sailthru's end.")
+    # verify the error is raised as expected with message
+    assert str(e.value) == "HTTP-error-code: {}, Error: 9, Message: {}".format(status_code, message)
 
-    @mock.patch("tap_sailthru.client.LOGGER.warning")
-    def test_403_and_99_error_custom_message(self, mocked_logger_warning, mocked_sleep, mocked_request):
-        """
-            Test case to verify for 403 error ane 99 sailthru error code
-            we do not raise error and log that error with warning
-        """
-        # mock json error response
-        response_json = {"error": 99, "message": "You may not export a blast that has not been sent"}
-        mocked_request.return_value = get_response(403, response_json, True)
+@pytest.mark.parametrize("status_code, exception, message, custom_message", ERROR_CASES)
+def test_error_custom_message(status_code, exception, message, custom_message):
+    """
+        Test case to verify the custom error message is used when the response has no "errormsg"
+    """
+    # mock json error response
+    response_json = {"error": 9, "message": message}
+    response = get_response(status_code, response_json)
 
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
+    with pytest.raises(exception) as e:
         # function call
-        actual_resp = sailthru_client._build_request("test_endpoint", {}, "GET")
+        client.raise_for_error(response)
 
-        # verify the logger.warning is called with expected message
-        mocked_logger_warning.assert_called_with("{}".format(response_json))
-        # verify the response we got is same as the mocked response
-        self.assertEqual(actual_resp, response_json)
+    # verify the error is raised as expected with message
+    assert str(e.value) == "HTTP-error-code: {}, Error: 9, Message: {}".format(status_code, custom_message)
 
-    def test_200_response(self, mocked_sleep, mocked_request):
-        """
-            Test case to verify error is not raise for 200 status code
-        """
-        # mock json error response
-        response_json = {"key1": "value1", "key2": "value2"}
-        mocked_request.return_value = get_response(200, response_json)
-        
-        # create sailthru client
-        sailthru_client = client.SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        # function call
+@mock.patch("tap_sailthru.client.LOGGER.warning")
+def test_403_and_99_error_custom_message(mocked_logger_warning, sailthru_client, mocked_request):
+    """
+        Test case to verify for 403 error ane 99 sailthru error code
+        we do not raise error and log that error with warning
+    """
+    # mock json error response
+    response_json = {"error": 99, "message": "You may not export a blast that has not been sent"}
+    mocked_request.return_value = get_response(403, response_json)
+
+    # function call
+    actual_resp = sailthru_client._build_request("test_endpoint", {}, "GET")
+
+    # verify the logger.warning is called with expected message
+    mocked_logger_warning.assert_called_with("{}".format(response_json))
+    # verify the response we got is same as the mocked response
+    assert actual_resp == response_json
+
+# the response body is returned for 200, a 500 or 429 error is retried until the backoff gives up
+RESPONSE_JSON = {"key1": "value1", "key2": "value2"}
+RATE_LIMIT_HEADERS = {"X-Rate-Limit-Remaining": "0", "X-Rate-Limit-Reset": "1617300030"}
+
+@pytest.mark.parametrize("status_code, headers, expected_calls, expected_response", [
+    (200, None, 1, RESPONSE_JSON),
+    (500, None, 3, None),
+    (429, RATE_LIMIT_HEADERS, 3, None),
+])
+def test_request_retries(sailthru_client, mocked_request, status_code, headers, expected_calls, expected_response):
+    """
+        Test case to verify error is not raised and not retried for 200 status code,
+        and 500 and 429 errors are retried 3 times
+    """
+    mocked_request.return_value = get_response(status_code, RESPONSE_JSON, headers)
+
+    # function call
+    try:
         response = sailthru_client._build_request("test_endpoint", {}, "GET")
+    except (client.SailthruInternalServerError, client.SailthruClient429Error):
+        response = None
+
+    # verify the mocked data is coming as expected and the request count
+    assert response == expected_response
+    assert mocked_request.call_count == expected_calls
+
+@pytest.mark.parametrize("headers, expected_sleep", [
+    (RATE_LIMIT_HEADERS, 30),  # wait until the rate limit resets
+    ({"X-Rate-Limit-Remaining": "0"}, client.RATE_LIMIT_WAIT),  # no reset time, default wait is used
+])
+@mock.patch("time.time", return_value=1617300000)
+@mock.patch("time.sleep")
+def test_429_error_waits_for_rate_limit_reset(mocked_sleep, mocked_time, sailthru_client, mocked_request,
+                                              headers, expected_sleep):
+    """
+        Test case to verify the 429 error is retried once the rate limit resets
+    """
+    mocked_request.return_value = get_response(429, RESPONSE_JSON, headers)
+
+    with pytest.raises(client.SailthruClient429Error):
+        sailthru_client._build_request("test_endpoint", {}, "GET")
 
-        # verify the mocked data is coming as expected
-        self.assertEqual(response, response_json)
+    # verify the client slept until the reset time before each retry
+    assert [call[0][0] for call in mocked_sleep.call_args_list] == [expected_sleep, expected_sleep]
@@ -0,0 +1,35 @@
+from unittest import mock
+from tap_sailthru.streams import BlastQuery
+
+def post_job(parameter=None, params=None):
+    # blast "2" can not be exported
+    if params["blast_id"] == "2":
+        return {"error": 99, "errormsg": "You may not export a blast that has not been sent"}
+    return {"job_id": "job_{}".format(params["blast_id"])}
+
+def process_job_csv(export_url, parent_params=None):
+    return [dict({"profile_id": export_url}, **parent_params)]
+
+@mock.patch("tap_sailthru.streams.BaseStream.process_job_csv", side_effect=process_job_csv)
+@mock.patch("tap_sailthru.streams.BaseStream.get_job_url", side_effect=lambda job_id: "url_{}".format(job_id))
+@mock.patch("tap_sailthru.streams.BaseStream.post_job", side_effect=post_job)
+@mock.patch("tap_sailthru.streams.BaseStream.get_parent_data", return_value=["1", "2", "3"])
+def test_blast_query_export_jobs(mocked_parent_data, mocked_post_job, mocked_get_job_url, mocked_process_job_csv,
+                                 sailthru_client):
+    """
+        Test case to verify a job is posted for every blast and the rejected blast is skipped
+    """
+    blast_query = BlastQuery(sailthru_client)
+
+    records = list(blast_query.get_records())
+
+    # verify each job got its own params and the class params are not mutated
+    posted_blast_ids = sorted(call[1]["params"]["blast_id"] for call in mocked_post_job.call_args_list)
+    assert posted_blast_ids == ["1", "2", "3"]
+    assert BlastQuery.params["blast_id"] == "{blast_id}"
+
+    # verify records are only fetched for the exported blasts
+    assert mocked_get_job_url.call_count == 2
+    assert sorted(records, key=lambda record: record["blast_id"]) == \
+        [{"profile_id": "url_job_1", "blast_id": "1"},
+         {"profile_id": "url_job_3", "blast_id": "3"}]
@@ -0,0 +1,26 @@
+from unittest import mock
+import tap_sailthru.streams as streams
+from tap_sailthru.streams import BaseStream
+
+@mock.patch("time.sleep")
+@mock.patch("tap_sailthru.client.SailthruClient.get_job")
+def test_poll_interval_backs_off(mocked_get_job, mocked_sleep, sailthru_client):
+    """
+        Test case to verify the poll interval backs off with jitter and no sleep happens once completed
+    """
+    mocked_get_job.side_effect = [
+        {"status": "pending"},
+        {"status": "pending"},
+        {"status": "pending"},
+        {"status": "completed", "export_url": "https://test/export.csv"},
+    ]
+    export_url = BaseStream(sailthru_client).get_job_url(job_id="test_job_id")
+
+    # verify the export url is returned after 4 polls with 3 growing sleeps
+    assert export_url == "https://test/export.csv"
+    assert mocked_get_job.call_count == 4
+    sleeps = [call[0][0] for call in mocked_sleep.call_args_list]
+    assert len(sleeps) == 3
+    for attempt, sleep in enumerate(sleeps):
+        interval = streams.JOB_POLL_INITIAL_INTERVAL * streams.JOB_POLL_BACKOFF_FACTOR ** attempt
+        assert interval * (1 - streams.JOB_POLL_JITTER) <= sleep <= interval * (1 + streams.JOB_POLL_JITTER)
@@ -0,0 +1,58 @@
+from unittest import mock
+import pytest
+from tap_sailthru.streams import BlastRepeats
+
+RECORDS = [
+    {"repeat_id": "1", "modify_time": "Thu, 01 Apr 2021 10:00:00 +0000"},
+    {"repeat_id": "2", "modify_time": "Fri, 02 Apr 2021 10:00:00 +0000"},
+]
+
+CONFIG = {"start_date": "2021-03-01T00:00:00Z"}
+
+@pytest.fixture
+def records():
+    # copy of the records returned by the stream, tests may add to it
+    return list(RECORDS)
+
+@pytest.fixture
+def mocked_write_record(records):
+    # return fresh copies, the sync mutates the records in place
+    with mock.patch("tap_sailthru.streams.BlastRepeats.get_records",
+                    side_effect=lambda *args, **kwargs: [dict(record) for record in records]), \
+            mock.patch("tap_sailthru.streams.RecordBuffer.write") as mocked_write_record:
+        yield mocked_write_record
+
+def sync(client, state):
+    transformer = mock.Mock()
+    transformer.transform.side_effect = lambda record, schema, metadata: record
+    return BlastRepeats(client).sync(state, {}, {}, CONFIG, transformer)
+
+def test_records_at_bookmark_are_skipped(sailthru_client, mocked_write_record):
+    """
+        Test case to verify a second sync does not re-emit the record which set the bookmark
+    """
+    state = sync(sailthru_client, {})
+    assert mocked_write_record.call_count == 2
+    assert len(state["bookmarks"]["blast_repeats"]["record_hashes_seen"]) == 1
+
+    mocked_write_record.reset_mock()
+    state = sync(sailthru_client, state)
+
+    # verify nothing new was emitted and the bookmark did not move
+    assert mocked_write_record.call_count == 0
+    assert state["bookmarks"]["blast_repeats"]["modify_time"] == "2021-04-02T10:00:00.000000Z"
+
+def test_new_record_at_bookmark_is_emitted(sailthru_client, records, mocked_write_record):
+    """
+        Test case to verify a new record sharing the bookmarked replication value is still emitted
+    """
+    state = sync(sailthru_client, {})
+    mocked_write_record.reset_mock()
+
+    records.append({"repeat_id": "3", "modify_time": "Fri, 02 Apr 2021 10:00:00 +0000"})
+    state = sync(sailthru_client, state)
+
+    # verify only the new record was emitted and both hashes are kept
+    assert mocked_write_record.call_count == 1
+    assert mocked_write_record.call_args[0][0]["repeat_id"] == "3"
+    assert len(state["bookmarks"]["blast_repeats"]["record_hashes_seen"]) == 2
@@ -0,0 +1,30 @@
+import unittest
+from unittest import mock
+from tap_sailthru.streams import BlastSaveList, Lists
+from tap_sailthru.client import SailthruClient
+
+@mock.patch("tap_sailthru.client.SailthruClient.get_lists")
+class TestLists(unittest.TestCase):
+    """
+        Test cases to verify the /list response is shared by the "Lists" stream and its child streams
+    """
+
+    def test_lists_requested_once_per_client(self, mocked_get_lists):
+        """
+            Verify /list is called once per client and every stream gets its own copy of the response
+        """
+        mocked_get_lists.return_value = {"lists": [{"list_id": "1", "name": "list 1"}]}
+        client = SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
+
+        records = list(Lists(client).get_records())
+        # modify the records in place, as the sync does
+        records[0]["name"] = "modified"
+        list_names = list(BlastSaveList(client).get_parent_data())
+
+        # verify the child stream is not affected by the modified records
+        self.assertEqual(list_names, ["list 1"])
+        self.assertEqual(mocked_get_lists.call_count, 1)
+
+        # verify a new client requests the lists again
+        list(Lists(SailthruClient("test_api_key", "test_api_secret", "test_user_agent")).get_records())
+        self.assertEqual(mocked_get_lists.call_count, 2)
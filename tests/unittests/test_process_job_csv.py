@@ -0,0 +1,54 @@
+import gzip
+import io
+import zlib
+from unittest import mock
+import pytest
+import requests
+from urllib3 import HTTPResponse
+from tap_sailthru.streams import BaseStream
+
+CSV_CONTENT = b'Profile Id,Name,Email\n1,"first\nline",a@test.com\n\n2,second\n'
+
+def get_mock_http_response(body, content_encoding=None):
+    # streamed response, the body is read and decompressed by urllib3 as in a real download
+    headers = {"Content-Encoding": content_encoding} if content_encoding else {}
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = HTTPResponse(body=io.BytesIO(body), headers=headers, status=200,
+                                preload_content=False, decode_content=True)
+    return response
+
+@pytest.mark.parametrize("body, content_encoding", [
+    (CSV_CONTENT, None),
+    (gzip.compress(CSV_CONTENT), "gzip"),
+    (zlib.compress(CSV_CONTENT), "deflate"),
+])
+@mock.patch("requests.Session.get")
+def test_process_job_csv(mocked_get, sailthru_client, body, content_encoding):
+    """
+        Test case to verify quoted line breaks, blank lines, short rows and parent params are handled
+    """
+    mocked_get.return_value = get_mock_http_response(body, content_encoding)
+
+    rows = list(BaseStream(sailthru_client).process_job_csv("https://test/export.csv",
+                                                            parent_params={"blast_id": 10}))
+
+    # verify the download is streamed with the client's request timeout
+    mocked_get.assert_called_once_with("https://test/export.csv", stream=True, timeout=300)
+    assert rows == [
+        {"Profile Id": "1", "Name": "first\nline", "Email": "a@test.com", "blast_id": 10},
+        {"Profile Id": "2", "Name": "second", "Email": None, "blast_id": 10},
+    ]
+
+@mock.patch("requests.Session.get")
+def test_process_job_csv_larger_than_chunk(mocked_get, sailthru_client):
+    """
+        Test case to verify a gzip encoded export spanning many reads is parsed completely
+    """
+    content = b"Profile Id,Email\n" + b"".join(b"%d,user_%d@test.com\n" % (index, index) for index in range(10000))
+    mocked_get.return_value = get_mock_http_response(gzip.compress(content), "gzip")
+
+    rows = list(BaseStream(sailthru_client).process_job_csv("https://test/export.csv", chunk_size=1024))
+
+    assert len(rows) == 10000
+    assert rows[-1] == {"Profile Id": "9999", "Email": "user_9999@test.com"}
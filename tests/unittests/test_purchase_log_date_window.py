@@ -1,34 +1,45 @@
 import datetime
-import unittest
+from collections import deque
 from unittest import mock
+import pytest
 from tap_sailthru.streams import PurchaseLog
-from tap_sailthru.client import SailthruClient
+from tap_sailthru.transform import get_daily_job_dates
 
-@mock.patch("tap_sailthru.streams.BaseStream.post_job")
-@mock.patch("tap_sailthru.streams.BaseStream.get_job_url")
-@mock.patch("tap_sailthru.streams.BaseStream.process_job_csv")
-@mock.patch("singer.utils.now")
-class PurchaseLogDateWindow(unittest.TestCase):
+@pytest.fixture
+def mocked_post_job():
+    # mock the export jobs and singer.utils.now to return the desired date
+    with mock.patch("tap_sailthru.streams.BaseStream.post_job") as mocked_post_job, \
+            mock.patch("tap_sailthru.streams.BaseStream.get_job_url"), \
+            mock.patch("tap_sailthru.streams.BaseStream.process_job_csv"), \
+            mock.patch("singer.utils.now", return_value=datetime.datetime(2021, 3, 1, 4, 45)):
+        yield mocked_post_job
+
+def test_date_window(mocked_post_job, sailthru_client):
     """
         Test case to verify the date window for "PurchaseLog" stream
     """
+    # set start date, 2 days before the now date
+    start_date = datetime.datetime(2021, 2, 27, 6, 30)
+
+    # create PurchaseLog object
+    purchase_log = PurchaseLog(sailthru_client)
+
+    # function call, exhausting the generator without keeping the records
+    deque(purchase_log.get_records(start_date), maxlen=0)
 
-    def test_date_window(self, mocked_now, mocked_process_job_csv, mocked_get_job_url, mocked_post_job):
-        # mock singer.utils.now and return desired date
-        mocked_now.return_value = datetime.datetime(2021, 3, 1, 4, 45)
+    # verify a job is posted for every day, the now date included
+    assert [call[1]["parameter"] for call in mocked_post_job.call_args_list] == \
+        [("20210227", "20210227"), ("20210228", "20210228"), ("20210301", "20210301")]
 
-        # set start date
-        start_date = datetime.datetime(2021, 1, 1, 6, 30)
+    # verify the job dates were set on the instance and not on the class params
+    assert purchase_log.params['start_date'] == '20210301'
+    assert PurchaseLog.params['start_date'] == '{purchase_log_start_date}'
 
-        # create SailthruClient object
-        client = SailthruClient("test_api_key", "test_api_secret", "test_user_agent")
-        # create PurchaseLog object
-        purchase_log = PurchaseLog(client)
 
-        # function call
-        records = list(purchase_log.get_records(start_date))
+def test_date_window_count():
+    # start date = 01-01-2021, now date = 01-03-2021
+    # date diff (in days) = 60 (inclusive), previously it was 30 calls
+    job_dates = list(get_daily_job_dates(datetime.datetime(2021, 1, 1, 6, 30),
+                                         datetime.datetime(2021, 3, 1, 4, 45)))
 
-        # verify the date window worked by comparing the call count of "post_job" function
-        # start date = 01-01-2021, now date = 01-03-2021
-        # date diff (in days) = 60 (inclusive), previously it was 30 calls
-        self.assertEquals(mocked_post_job.call_count, 60)
+    assert len(job_dates) == 60
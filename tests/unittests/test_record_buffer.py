@@ -0,0 +1,29 @@
+import io
+import json
+import unittest
+from unittest import mock
+from tap_sailthru.streams import RecordBuffer
+
+class TestRecordBuffer(unittest.TestCase):
+    """
+        Test cases to verify record messages are buffered before being written
+    """
+
+    @mock.patch("sys.stdout", new_callable=io.StringIO)
+    def test_records_written_in_batches(self, mocked_stdout):
+        """
+            Verify records are written once the buffer is full and the rest on exit
+        """
+        with RecordBuffer("lists", buffer_size=2) as record_buffer:
+            record_buffer.write({"list_id": "1"})
+            # verify nothing is written until the buffer is full
+            self.assertEqual(mocked_stdout.getvalue(), "")
+            record_buffer.write({"list_id": "2"})
+            self.assertEqual(len(mocked_stdout.getvalue().splitlines()), 2)
+            record_buffer.write({"list_id": "3"})
+
+        # verify the remaining record is written on exit as a singer RECORD message
+        messages = [json.loads(line) for line in mocked_stdout.getvalue().splitlines()]
+        self.assertEqual([message["record"]["list_id"] for message in messages], ["1", "2", "3"])
+        self.assertTrue(all(message["type"] == "RECORD" and message["stream"] == "lists"
+                            for message in messages))
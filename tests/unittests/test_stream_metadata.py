@@ -0,0 +1,20 @@
+import pytest
+from tap_sailthru.streams import (AdTargeterPlans, BlastQuery, BlastRepeats,
+                                  Blasts, BlastSaveList, Lists, PurchaseLog,
+                                  Users)
+
+@pytest.mark.parametrize('stream_class, expected_key_properties', [
+    (AdTargeterPlans, ['plan_id']),
+    (Blasts, ['blast_id']),
+    (BlastQuery, ['profile_id', 'blast_id']),
+    (BlastRepeats, ['repeat_id']),
+    (Lists, ['list_id']),
+    (BlastSaveList, ['profile_id']),
+    (Users, ['profile_id']),
+    (PurchaseLog, ['date', 'email_hash', 'extid', 'message_id', 'price', 'channel']),
+])
+def test_key_properties(sailthru_client, stream_class, expected_key_properties):
+    """
+        Test case to verify the Primary Key of each stream
+    """
+    assert stream_class(client=sailthru_client).key_properties == expected_key_properties
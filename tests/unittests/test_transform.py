@@ -1,102 +1,147 @@
 import datetime
 
-import pytz
+import pytest
 
 from tap_sailthru.transform import (flatten_user_response,
+                                    format_date_for_job_params,
+                                    get_daily_job_dates,
                                     get_start_and_end_date_params,
-                                    rfc2822_to_datetime)
+                                    rfc2822_to_datetime,
+                                    transform_keys_to_snake_case)
 
+UTC = datetime.timezone.utc
 
-def test_rfc2822_to_datetime():
-    datestring = 'Wed, 31 Mar 2021 22:15:07 -0400'
-    expected = datetime.datetime(2021, 4, 1, 2, 15, 7, tzinfo=pytz.utc)
 
+@pytest.mark.parametrize('datestring, expected', [
+    # fixed layout returned by Sailthru
+    ('Wed, 31 Mar 2021 22:15:07 -0400', datetime.datetime(2021, 4, 1, 2, 15, 7, tzinfo=UTC)),
+    ('Thu, 01 Apr 2021 02:45:07 +0530', datetime.datetime(2021, 3, 31, 21, 15, 7, tzinfo=UTC)),
+    # other RFC 2822 variants, parsed by the fallbacks
+    ('Wed, 31 Mar 2021 22:15:07 EDT', datetime.datetime(2021, 4, 1, 2, 15, 7, tzinfo=UTC)),
+    ('31 Mar 2021 22:15:07 -0000', datetime.datetime(2021, 3, 31, 22, 15, 7, tzinfo=UTC)),
+])
+def test_rfc2822_to_datetime(datestring, expected):
     result = rfc2822_to_datetime(datestring)
 
     assert expected == result
 
 
-def test_get_start_and_end_date_params():
-    test_cases = [
-        {'case': datetime.datetime(2021, 1, 1, 0, 0, tzinfo=pytz.utc), 'expected': (datetime.datetime(2021, 1, 1, 0, 0, tzinfo=pytz.utc), datetime.datetime(2021, 1, 31, 0, 0, tzinfo=pytz.utc))},
-        {'case': datetime.datetime(1973, 12, 31, 0, 0, tzinfo=pytz.utc), 'expected': (datetime.datetime(1973, 12, 31, 0, 0, tzinfo=pytz.utc), datetime.datetime(1974, 1, 30, 0, 0, tzinfo=pytz.utc))},
-        {'case': datetime.datetime(2002, 5, 11, 0, 0, tzinfo=pytz.utc), 'expected': (datetime.datetime(2002, 5, 11, 0, 0, tzinfo=pytz.utc), datetime.datetime(2002, 6, 10, 0, 0, tzinfo=pytz.utc))},
-        {'case': datetime.datetime(1950, 10, 9, 0, 0, tzinfo=pytz.utc), 'expected': (datetime.datetime(1950, 10, 9, 0, 0, tzinfo=pytz.utc), datetime.datetime(1950, 11, 8, 0, 0, tzinfo=pytz.utc))},
-    ]
-
-    for test_case in test_cases:
-        result = get_start_and_end_date_params(test_case['case'])
-
-        assert test_case['expected'] == result
-
-
-def test_flatten_user_response():
-    test_cases = [
-        {'case': {
-            'keys': {
-                'sid': 'pid1234',
-                'cookie': 'cookie1234',
-                'email': 'random.user@bytecode.io'
-                },
-            'vars': None,
-            'lists': {
-                'my-user-list': 'Wed, 24 Mar 2021 14:25:42 -0400'
-                },
-            'engagement': 'disengaged',
-            'optout_email': 'none'},
-        'expected': {
-            'profile_id': 'pid1234',
+@pytest.mark.parametrize('test_case', [
+    {'case': datetime.datetime(2021, 1, 1, 0, 0, tzinfo=UTC), 'expected': (datetime.datetime(2021, 1, 1, 0, 0, tzinfo=UTC), datetime.datetime(2021, 1, 31, 0, 0, tzinfo=UTC))},
+    {'case': datetime.datetime(1973, 12, 31, 0, 0, tzinfo=UTC), 'expected': (datetime.datetime(1973, 12, 31, 0, 0, tzinfo=UTC), datetime.datetime(1974, 1, 30, 0, 0, tzinfo=UTC))},
+    {'case': datetime.datetime(2002, 5, 11, 0, 0, tzinfo=UTC), 'expected': (datetime.datetime(2002, 5, 11, 0, 0, tzinfo=UTC), datetime.datetime(2002, 6, 10, 0, 0, tzinfo=UTC))},
+    {'case': datetime.datetime(1950, 10, 9, 0, 0, tzinfo=UTC), 'expected': (datetime.datetime(1950, 10, 9, 0, 0, tzinfo=UTC), datetime.datetime(1950, 11, 8, 0, 0, tzinfo=UTC))},
+])
+def test_get_start_and_end_date_params(test_case):
+    result = get_start_and_end_date_params(test_case['case'])
+
+    assert test_case['expected'] == result
+
+
+def test_format_date_for_job_params():
+    assert format_date_for_job_params(datetime.datetime(2021, 3, 1, 6, 30, tzinfo=UTC)) == '20210301'
+    assert format_date_for_job_params(datetime.datetime(1973, 12, 31, 0, 0, tzinfo=UTC)) == '19731231'
+
+
+def test_get_daily_job_dates():
+    start = datetime.datetime(2021, 1, 30, 6, 30, tzinfo=UTC)
+    end = datetime.datetime(2021, 2, 2, 4, 45, tzinfo=UTC)
+
+    result = list(get_daily_job_dates(start, end))
+
+    assert result == ['20210130', '20210131', '20210201', '20210202']
+
+
+@pytest.mark.parametrize('test_case', [
+    {'case': {
+        'keys': {
+            'sid': 'pid1234',
             'cookie': 'cookie1234',
-            'email': 'random.user@bytecode.io',
-            'vars': None,
-            'lists': ['my-user-list'],
-            'engagement': 'disengaged',
-            'optout_email': 'none',
-            }
-        },
-        {'case': {
-            'keys': {
-                'sid': None,
-                'cookie': None,
-                'email': None,
+            'email': 'random.user@bytecode.io'
+            },
+        'vars': None,
+        'lists': {
+            'my-user-list': 'Wed, 24 Mar 2021 14:25:42 -0400'
             },
-            'vars': None,
-            'lists': {},
-            'engagement': None,
-            'optout_email': None},
-        'expected': {
-            'profile_id': None,
+        'engagement': 'disengaged',
+        'optout_email': 'none'},
+    'expected': {
+        'profile_id': 'pid1234',
+        'cookie': 'cookie1234',
+        'email': 'random.user@bytecode.io',
+        'vars': None,
+        'lists': ['my-user-list'],
+        'engagement': 'disengaged',
+        'optout_email': 'none',
+        }
+    },
+    {'case': {
+        'keys': {
+            'sid': None,
             'cookie': None,
             'email': None,
-            'vars': None,
-            'lists': [],
-            'engagement': None,
-            'optout_email': None,
-            }
         },
-        {'case': {
-            'keys': {
-                'sid': None,
-                'cookie': None,
-                'email': None,
-            },
-            'vars': None,
-            'lists': None,
-            'engagement': None,
-            'optout_email': None},
-        'expected': {
-            'profile_id': None,
+        'vars': None,
+        'lists': {},
+        'engagement': None,
+        'optout_email': None},
+    'expected': {
+        'profile_id': None,
+        'cookie': None,
+        'email': None,
+        'vars': None,
+        'lists': [],
+        'engagement': None,
+        'optout_email': None,
+        }
+    },
+    {'case': {
+        'keys': {
+            'sid': None,
             'cookie': None,
             'email': None,
-            'vars': None,
-            'lists': [],
-            'engagement': None,
-            'optout_email': None,
-            }
         },
-    ]
+        'vars': None,
+        'lists': None,
+        'engagement': None,
+        'optout_email': None},
+    'expected': {
+        'profile_id': None,
+        'cookie': None,
+        'email': None,
+        'vars': None,
+        'lists': [],
+        'engagement': None,
+        'optout_email': None,
+        }
+    },
+    {'case': {
+        'keys': {
+            'sid': 'pid1234',
+            'cookie': None,
+            'email': 'random.user@bytecode.io',
+        },
+        'engagement': 'engaged'},
+    'expected': {
+        'profile_id': 'pid1234',
+        'cookie': None,
+        'email': 'random.user@bytecode.io',
+        'vars': None,
+        'lists': [],
+        'engagement': 'engaged',
+        'optout_email': None,
+        }
+    },
+])
+def test_flatten_user_response(test_case):
+    result = flatten_user_response(test_case['case'])
+
+    assert test_case['expected'] == result
+
+
+def test_transform_keys_to_snake_case():
+    record = {'Profile Id': 'pid1234', 'Email Address': 'random.user@bytecode.io', 'blast_id': 10}
 
-    for test_case in test_cases:
-        result = flatten_user_response(test_case['case'])
+    transform_keys_to_snake_case(record)
 
-        assert test_case['expected'] == result
+    assert record == {'profile_id': 'pid1234', 'email_address': 'random.user@bytecode.io', 'blast_id': 10}
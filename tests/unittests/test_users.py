@@ -0,0 +1,43 @@
+from unittest import mock
+import pytest
+from tap_sailthru.streams import USER_BATCH_SIZE, Users
+from tap_sailthru.client import SailthruClient, SailthruClientError
+
+def get_user(params):
+    return {"keys": {"sid": params["id"]}, "lists": {"list_{}".format(params["id"]): "Wed, 24 Mar 2021 14:25:42 -0400"}}
+
+@mock.patch("tap_sailthru.client.SailthruClient.get_user", side_effect=get_user)
+@mock.patch("tap_sailthru.streams.BaseStream.get_parent_data")
+def test_users_fetched_for_each_profile(mocked_parent_data, mocked_get_user, sailthru_client):
+    """
+        Test case to verify a user is fetched for every parent record with a Profile Id
+    """
+    mocked_parent_data.return_value = [{"Profile Id": str(index)} for index in range(300)] + [{"Profile Id": ""}]
+    records = list(Users(sailthru_client).get_records())
+
+    # verify the record without Profile Id is skipped and every other profile is flattened
+    assert mocked_get_user.call_count == 300
+    assert sorted(int(record["profile_id"]) for record in records) == list(range(300))
+    assert all(record["lists"] == ["list_{}".format(record["profile_id"])] for record in records)
+
+@mock.patch("tap_sailthru.client.SailthruClient.get_user", side_effect=get_user)
+@mock.patch("tap_sailthru.streams.BaseStream.get_parent_data")
+def test_users_not_fetched_after_error(mocked_parent_data, mocked_get_user):
+    """
+        Test case to verify the queued profiles of a batch are not fetched once a request fails
+    """
+    mocked_parent_data.return_value = [{"Profile Id": str(index)} for index in range(USER_BATCH_SIZE)]
+
+    def get_user_or_raise(params):
+        if params["id"] == "0":
+            raise SailthruClientError("test error")
+        return get_user(params)
+    mocked_get_user.side_effect = get_user_or_raise
+    # a single worker fetches the profiles one by one
+    client = SailthruClient("test_api_key", "test_api_secret", "test_user_agent", user_fetch_concurrency=1)
+
+    with pytest.raises(SailthruClientError):
+        list(Users(client).get_records())
+
+    # verify at most the profile already picked up by the worker was fetched after the error
+    assert mocked_get_user.call_count <= 2